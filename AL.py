@@ -23,25 +23,36 @@ e.g.
 
 # twisted imports
 from twisted.words.protocols import irc
-from twisted.internet import reactor, protocol
+from twisted.internet import reactor, protocol, task, threads
 from twisted.python import log
 
 # system imports
 import time
 import sys
 from scrapers.cafescraper import scrapeCafe
-from apis.weatherman import currentWeather
+from apis.weatherman import currentWeather, refreshWeather, warmWeather
 from apis.wolfram import wolfram
-from apis.urbandic import urbanDict
-from apis.lastfm import getCurrentSong
+from apis.urbandic import urbanDefinitions
+from apis.lastfm import getCurrentSong, NowPlaying
 from apis.rottentomatoes import rottentomatoes
-from apis.reddit import getSubReddit, getQuote
+from apis.reddit import getSubRedditPosts, getQuote
+from utils.cursors import ResultCursors
+from utils.answerstore import AnswerStore
+from utils.scheduler import Scheduler
 from random import randint
 import ConfigParser
 import json
 import traceback
 
 
+# commands that a scheduled job can pre-warm, and what fills their cache
+PREWARM = {
+    'cafe': scrapeCafe,
+    'weather': warmWeather,
+    'quote': getQuote
+}
+
+
 
 class MessageLogger:
     """
@@ -76,8 +87,46 @@ class LogBot(irc.IRCClient):
     def __init__(self):
         self.stored_messages = self.getMessages()
         self.user_info = self.getUserInfo()
+        self.channel = None
+        self.cursors = ResultCursors()
+        self.answers = AnswerStore('files/wolfram_answers.json',
+                                   int(self.getConfig('wolfram', 'store_size', 500)))
+        self.weather_job = task.LoopingCall(self.refreshWeather)
+        lastfm_users = self.getConfig('lastfm', 'users', '')
+        self.now_playing = NowPlaying([u.strip() for u in lastfm_users.split(',') if u.strip()])
+        self.lastfm_job = task.LoopingCall(self.pollSongs)
+        self.scheduler = Scheduler('files/schedule.json')
+        self.loadJobs()
+
+
+    def getConfig(self, section, option, default=None):
+        """ Read an option from config.cfg, falling back to default if it isn't set """
+        config = ConfigParser.RawConfigParser()
+        config.read('config.cfg')
+        if config.has_option(section, option):
+            return config.get(section, option)
+        return default
 
     
+    def loadJobs(self):
+        """ Schedule the [schedule:<command>] jobs from config.cfg """
+        config = ConfigParser.RawConfigParser()
+        config.read('config.cfg')
+        for section in config.sections():
+            if not section.startswith('schedule:'):
+                continue
+            command = section.split(':', 1)[1]
+            if command not in PREWARM:
+                print "I don't know how to schedule %s, skipping it" % command
+                continue
+            # a bad job shouldn't stop the bot from connecting
+            try:
+                post = config.has_option(section, 'post') and config.getboolean(section, 'post')
+                self.scheduler.add(command, config.get(section, 'when'), self.runJob, command, post)
+            except (ValueError, ConfigParser.Error) as e:
+                print "I can't schedule %s (%s), skipping it" % (command, e)
+
+
     def getMessages(self):
         """ Get my persisted messages from the message.json file"""
         with open('files/messages.json', 'r') as f:
@@ -109,6 +158,16 @@ class LogBot(irc.IRCClient):
                 return {}
 
 
+    def sendPaged(self, channel, user, answers, count=1):
+        """ Send the first <count> answers and keep the rest for 'more' """
+        for answer in answers[:count]:
+            self.msg(channel, answer)
+        self.cursors.start((channel, user), answers[count:])
+        remaining = self.cursors.remaining((channel, user))
+        if remaining:
+            self.msg(channel, '({0} more, say more)'.format(remaining))
+
+
     def logError(self, channel):
         """ Log an error to STDOUT, the logs, and chat """
         print traceback.format_exc() 
@@ -129,15 +188,93 @@ class LogBot(irc.IRCClient):
         self.logger.log("[connected at %s]" % 
                         time.asctime(time.localtime(time.time())))
         self.join(self.factory.channel)
+        self.weather_job.start(int(self.getConfig('weather', 'refresh', 600)), now=False)
+        if self.now_playing.usernames:
+            self.lastfm_job.start(int(self.getConfig('lastfm', 'interval', 60)))
+        self.scheduler.start()
 
 
     def connectionLost(self, reason):
         irc.IRCClient.connectionLost(self, reason)
+        for job in [self.weather_job, self.lastfm_job]:
+            if job.running:
+                job.stop()
+        self.scheduler.stop()
         self.logger.log("[disconnected at %s]" % 
                         time.asctime(time.localtime(time.time())))
         self.logger.close()
 
 
+    def refreshWeather(self):
+        """ Refresh the most requested weather locations off the reactor thread """
+        d = threads.deferToThread(refreshWeather)
+        d.addErrback(self.logJobError, 'weather refresh')
+        return d
+
+
+    def pollSongs(self):
+        """ Poll the watched last.fm users off the reactor thread """
+        d = threads.deferToThread(self.now_playing.pollAll)
+        d.addCallback(self.announceSongs)
+        d.addErrback(self.logJobError, 'last.fm poll')
+        return d
+
+
+    def announceSongs(self, changes):
+        """ Tell the channel about track changes, if that's turned on """
+        if not self.channel or self.getConfig('lastfm', 'announce', 'no').lower() not in ['yes', 'true', 'on', '1']:
+            return
+        for username, song in changes:
+            self.msg(self.channel, '{0} is now listening to {1}'.format(username, song.encode('utf-8')))
+
+
+    def runJob(self, command, post):
+        """ Warm a command's cache off the reactor thread, optionally posting the result """
+        d = threads.deferToThread(PREWARM[command])
+        if post:
+            d.addCallback(self.postDigest, command)
+        d.addErrback(self.logJobError, '%s job' % command)
+        return d
+
+
+    def postDigest(self, result, command):
+        """ Post a pre-warmed result to the channel """
+        if not self.channel:
+            return
+        if command == 'cafe':
+            self.sendMenu(self.channel, result)
+        elif command == 'weather':
+            self.sendWeather(self.channel, result)
+        elif command == 'quote' and result:
+            self.msg(self.channel, result.encode('utf-8'))
+
+
+    def sendMenu(self, channel, menu):
+        """ Make the menu all nice for chat purposes """
+        for k, v in menu['stations'].items():
+            if v:
+                station = '{:.<{station_width}}'.format(k.encode('utf-8'), station_width=menu['station_max_width'] + 4)
+                item = '{:.>{item_width}}'.format(v['item'].encode('utf-8'), item_width=menu['item_max_width'])
+                self.msg(channel, '%s%s   %s' % (station, item, v['price'].encode('utf-8')))
+
+
+    def sendWeather(self, channel, weather):
+        """ Tell the channel about the weather """
+        w_msg = 'The weather in {0} is {1}, {2} degrees, {3}% humdity.'.format(
+            weather['place'],
+            weather['status'],
+            weather['temp'],
+            weather['humidity']
+        )
+        self.msg(channel, w_msg)
+        self.logger.log(w_msg)
+
+
+    def logJobError(self, failure, job):
+        """ Log a failed background job without stopping its schedule """
+        self.logger.log("%s failed:\n%s" % (job, failure.getTraceback()))
+
+
     # callbacks for events
 
     def signedOn(self):
@@ -147,6 +284,7 @@ class LogBot(irc.IRCClient):
 
     def joined(self, channel):
         """This will get called when the bot joins the channel."""
+        self.channel = channel
         self.logger.log("[I have joined %s]" % channel)
 
 
@@ -200,8 +338,10 @@ class LogBot(irc.IRCClient):
                     \nremember <name> <email> <phone number> (email, phone optional)\
                     \nupdate <user> <new email>\
                     \nsong <lastfm user>\
+                    \nnp all\
                     \nmovie <movie name>\
                     \nreddit <subreddit> <# of article optional>\
+                    \nmore (the next definition, post or answer)\
                     \nor just ask me a question'
                     self.msg(user, help_msg)
                 except Exception as e:
@@ -211,12 +351,7 @@ class LogBot(irc.IRCClient):
             elif parts[1] == 'cafe':
                 try:
                     menu = scrapeCafe()
-                    # make the menu all nice for chat purposes
-                    for k, v in menu['stations'].items():
-                        if v:
-                            station = '{:.<{station_width}}'.format(k.encode('utf-8'), station_width=menu['station_max_width'] + 4)
-                            item = '{:.>{item_width}}'.format(v['item'].encode('utf-8'), item_width=menu['item_max_width'])
-                            self.msg(channel, '%s%s   %s' % (station, item, v['price'].encode('utf-8')))
+                    self.sendMenu(channel, menu)
                 except Exception as e:
                     self.logError(channel)
 
@@ -243,14 +378,7 @@ class LogBot(irc.IRCClient):
                         weather = currentWeather(city, state)
                     else:
                         weather = currentWeather()
-                    w_msg = 'The weather in {0} is {1}, {2} degrees, {3}% humdity.'.format(
-                        weather['place'],
-                        weather['status'],
-                        weather['temp'],
-                        weather['humidity']
-                    )
-                    self.msg(channel, w_msg)
-                    self.logger.log(w_msg)
+                    self.sendWeather(channel, weather)
                 except Exception as e:
                     self.logError(channel)
 
@@ -297,13 +425,14 @@ class LogBot(irc.IRCClient):
                     except IndexError:
                         count = 1
 
-                    reddit_response = getSubReddit(subreddit, count)
-                    if reddit_response:
-                        answer = '{0}: {1} : {2}'.format(
-                            count,
-                            reddit_response['title'],
-                            reddit_response['url'])
-                        self.msg(channel, answer.encode('utf-8'))
+                    # grab a whole page so 'more' doesn't have to go back to reddit
+                    reddit_response = getSubRedditPosts(subreddit, max(count, 25))
+                    if reddit_response and len(reddit_response) >= count:
+                        answers = [u'{0}: {1} : {2}'.format(
+                            i + 1,
+                            post['title'],
+                            post['url']).encode('utf-8') for i, post in enumerate(reddit_response)]
+                        self.sendPaged(channel, user, answers[count - 1:])
                     else:
                         answer = 'I can\'t find that on reddit'
                         self.msg(channel, answer)
@@ -314,19 +443,32 @@ class LogBot(irc.IRCClient):
             elif parts[1] == 'define':
                 try:
                     question = ' '.join(parts[2:])
-                    urban_response = urbanDict(question)
+                    urban_response = urbanDefinitions(question)
                     if urban_response:
-                        answer = '{0}\nFor Example: {1}\n{2}'.format(
-                                            urban_response['definition'], 
-                                            urban_response['example'], 
-                                            urban_response['permalink']) 
-                        self.msg(channel, answer)
+                        answers = ['{0}\nFor Example: {1}\n{2}'.format(
+                                            definition['definition'], 
+                                            definition['example'], 
+                                            definition['permalink']) for definition in urban_response]
+                        self.sendPaged(channel, user, answers)
                     else:
                         answer = 'I don\'t know'
                         self.msg(channel, answer)
                 except Exception as e:
                     self.logError(channel)
 
+            elif parts[1] == 'more':
+                try:
+                    answer = self.cursors.more((channel, user))
+                    if answer:
+                        self.msg(channel, answer)
+                        remaining = self.cursors.remaining((channel, user))
+                        if remaining:
+                            self.msg(channel, '({0} more)'.format(remaining))
+                    else:
+                        self.msg(channel, 'There isn\'t any more')
+                except Exception as e:
+                    self.logError(channel)
+
             elif ' '.join(parts[1:3]) == 'show users':
                 try:
                     self.msg(channel, ', '.join([user for user in self.user_info]).encode('utf-8'))
@@ -379,12 +521,27 @@ class LogBot(irc.IRCClient):
             elif parts[1] == 'song':
                 try:
                     user = parts[2]
-                    song = getCurrentSong(user)
+                    # watched users are answered from memory
+                    song = self.now_playing.tracks.get(user)
+                    if not song:
+                        song = getCurrentSong(user)
                     if song:
                         self.msg(channel, '{0} is listening to {1}'.format(user, song.encode('utf-8')))
                 except Exception as e:
                     self.logError(channel)
 
+            elif ' '.join(parts[1:3]) == 'np all':
+                try:
+                    tracks = self.now_playing.tracks
+                    if tracks:
+                        for user in self.now_playing.usernames:
+                            if user in tracks:
+                                self.msg(channel, '{0} is listening to {1}'.format(user, tracks[user].encode('utf-8')))
+                    else:
+                        self.msg(channel, 'I don\'t know what anyone is listening to')
+                except Exception as e:
+                    self.logError(channel)
+
             elif parts[1] in ['Will', 'will']:
                 try:
                     possible_ansers = [
@@ -405,12 +562,16 @@ class LogBot(irc.IRCClient):
         #==========================================================================================
             else:
                 try:
-                    config = ConfigParser.RawConfigParser()
-                    config.read('config.cfg')
-                    key = config.get('wolfram', 'key')
                     question = ' '.join(parts[1:])
-                    w = wolfram(key)
-                    result = w.search(question)
+                    # only go to wolfram if we haven't got a fresh answer on disk
+                    result = self.answers.get(question)
+                    if result is None:
+                        config = ConfigParser.RawConfigParser()
+                        config.read('config.cfg')
+                        key = config.get('wolfram', 'key')
+                        w = wolfram(key)
+                        result = w.search(question)
+                        self.answers.put(question, result)
                     if result:
                         answer = result.get('Value', 
                                 result.get('Result',
@@ -421,14 +582,9 @@ class LogBot(irc.IRCClient):
                         if answer:
                             self.msg(channel, answer.encode('utf-8'))
                         else:
-                            count = 0
                             self.msg(channel, 'Not entirely sure, maybe this helps?:')
-                            for k, v in result.items():
-                                if count < 2:
-                                    self.msg(channel, v.encode('utf-8'))
-                                else:
-                                    self.msg(user, v.encode('utf-8'))
-                                count += 1
+                            answers = [v.encode('utf-8') for v in result.values() if v]
+                            self.sendPaged(channel, user, answers, 2)
                     else:
                         self.msg(channel, 'I don\'t know')
 
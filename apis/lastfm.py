@@ -1,5 +1,28 @@
 import requests
-from bs4 import BeautifulSoup
+from StringIO import StringIO
+from xml.etree import ElementTree as etree
+
+FEED_URL = 'http://ws.audioscrobbler.com/1.0/user/%s/recenttracks.rss'
+
+# seconds to wait on a feed, so one hung user can't stall the shared poll
+TIMEOUT = 10
+
+
+def _firstTitle(xml):
+    """
+    Pull the first track title out of a recent tracks feed without
+    parsing the rest of it
+    @param: xml (string)
+    @returns: song (string) or None for an empty feed
+    """
+    in_item = False
+    for event, elem in etree.iterparse(StringIO(xml), events=('start', 'end')):
+        if elem.tag == 'item':
+            in_item = True
+        elif in_item and event == 'end' and elem.tag == 'title':
+            return elem.text
+    return None
+
 
 def getCurrentSong(username):
     """
@@ -7,10 +30,64 @@ def getCurrentSong(username):
     @param: username (string)
     @returns: song (string)
     """
-    r = requests.get('http://ws.audioscrobbler.com/1.0/user/%s/recenttracks.rss' % username)
+    r = requests.get(FEED_URL % username)
     if r.status_code == 200:
-        soup = BeautifulSoup(r.text)
-        return soup.item.title.string
+        return _firstTitle(r.content)
+
+
+class NowPlaying(object):
+    """
+    Keeps the latest track for a set of last.fm users in memory, polling
+    their feeds with conditional requests so unchanged feeds cost a 304
+    """
+    def __init__(self, usernames):
+        self.usernames = list(usernames)
+        self.tracks = {}
+        self.validators = {}
+        self.session = requests.Session()
+
+    def poll(self, username):
+        """
+        Check one user's feed
+        @param: username (string)
+        @returns: song (string) if it changed since the last poll, else None
+        """
+        headers = {}
+        etag, modified = self.validators.get(username, (None, None))
+        if etag:
+            headers['If-None-Match'] = etag
+        if modified:
+            headers['If-Modified-Since'] = modified
+
+        r = self.session.get(FEED_URL % username, headers=headers, timeout=TIMEOUT)
+        if r.status_code != 200:
+            return None
+
+        self.validators[username] = (r.headers.get('etag'), r.headers.get('last-modified'))
+        song = _firstTitle(r.content)
+        previous = self.tracks.get(username)
+        if song and song != previous:
+            self.tracks[username] = song
+            # the first track we see for someone isn't a change
+            if previous is not None:
+                return song
+        return None
+
+    def pollAll(self):
+        """
+        Poll every watched user
+        @returns: list of (username, song) for users whose track changed
+        """
+        changes = []
+        for username in self.usernames:
+            # one bad feed shouldn't hold up everyone else
+            try:
+                song = self.poll(username)
+            except (requests.RequestException, etree.ParseError):
+                continue
+            if song:
+                changes.append((username, song))
+        return changes
 
 
 if __name__ == '__main__':
@@ -0,0 +1,64 @@
+import os
+import re
+import json
+
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locations.json')
+
+_index = None
+
+
+def loadIndex(filename=INDEX_FILE):
+    """
+    Load the offline location index that maps zip codes and city/state
+    pairs to openweathermap city ids
+    @param filename: String, path to the index json file
+    @return index: Dict with 'places' and 'zips' lookup tables
+    """
+    global _index
+    with open(filename, 'r') as f:
+        data = json.loads(f.read())
+
+    places = {}
+    for city_id, city in data['cities'].items():
+        places[normalizePlace(city['name'], city['state'])] = city_id
+
+    _index = {
+        'places': places,
+        'zips': data['zips']
+    }
+    return _index
+
+
+def normalizePlace(city, state):
+    """
+    Build the lookup key for a city/state pair so 'provo ut', 'Provo UT'
+    and 'Provo,  ut' all end up in the same place
+    @return key: String like 'provo,ut'
+    """
+    city = re.sub(r'[^a-z0-9 ]', ' ', city.lower())
+    state = re.sub(r'[^a-z]', '', state.lower())
+    return '%s,%s' % (' '.join(city.split()), state)
+
+
+def resolveLocation(city='', state='', zip=None):
+    """
+    Find the openweathermap city id for a zip code or city/state pair
+    @param city: String, the city name
+    @param state: String, 2 letter state abbreviation (UT)
+    @param zip: String, 5 digit zip code
+    @return city_id: String, or None if the place isn't in the index
+    """
+    if _index is None:
+        loadIndex()
+
+    if zip is not None:
+        return _index['zips'].get(zip.strip())
+    return _index['places'].get(normalizePlace(city, state))
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) == 2:
+        print resolveLocation(zip=sys.argv[1])
+    else:
+        print resolveLocation(' '.join(sys.argv[1:-1]), sys.argv[-1])
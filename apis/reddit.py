@@ -1,27 +1,46 @@
+import time
 import requests
 import json
 
-def getSubReddit(query, count):
+# how long (seconds) to reuse the quotes listing before fetching it again
+QUOTE_TTL = 60 * 60
+
+_quotes = {}
+
+def getSubRedditPosts(query, limit=25):
     """
-    Gets the <count> story on reddit for a given subreddit <query>
-    @return response dictionary item 
+    Gets the first <limit> stories on reddit for a given subreddit <query>
+    @return list of response dictionaries, or None
     """
 
     # send the request and get the data
-    r = requests.get('http://www.reddit.com/r/%s.json?limit=%s' % (query, count))
+    r = requests.get('http://www.reddit.com/r/%s.json?limit=%s' % (query, limit))
 
     try:
         data = json.loads(r.text)
     except ValueError:
         return None
 
-    count = count - 1
     if 'data' in data:
-        response = {
-            'title':data['data']['children'][count]['data']['title'],
-            'permalink':data['data']['children'][count]['data']['permalink'],
-            'url':data['data']['children'][count]['data']['url']
-        }
+        response = [{
+            'title':child['data']['title'],
+            'permalink':child['data']['permalink'],
+            'url':child['data']['url']
+        } for child in data['data']['children']]
+    else:
+        response = None
+
+    return response
+
+
+def getSubReddit(query, count):
+    """
+    Gets the <count> story on reddit for a given subreddit <query>
+    @return response dictionary item 
+    """
+    posts = getSubRedditPosts(query, count)
+    if posts and len(posts) >= count:
+        response = posts[count - 1]
     else:
         response = None
 
@@ -35,19 +54,22 @@ def getQuote():
     """
     from random import randint
 
-    # send the request and get the data
-    r = requests.get('http://www.reddit.com/r/quotes.json?limit=100')
+    if not _quotes or time.time() - _quotes['fetched'] > QUOTE_TTL:
+        # send the request and get the data
+        r = requests.get('http://www.reddit.com/r/quotes.json?limit=100')
 
-    try:
-        data = json.loads(r.text)
-    except ValueError:
-        return None
+        try:
+            data = json.loads(r.text)
+        except ValueError:
+            return None
 
-    if 'data' in data:
-        i = randint(0,len(data['data']['children'])-1)
-        response = data['data']['children'][i]['data']['title']
-    else:
-        response = None
+        if 'data' not in data or not data['data']['children']:
+            return None
+        _quotes['titles'] = [child['data']['title'] for child in data['data']['children']]
+        _quotes['fetched'] = time.time()
+
+    i = randint(0,len(_quotes['titles'])-1)
+    response = _quotes['titles'][i]
 
     return response
         
@@ -1,7 +1,7 @@
-def urbanDict(query):
+def urbanDefinitions(query):
     """
-    Searches urbandictionary.com for a definition to the query given
-    @return response dictionary 
+    Searches urbandictionary.com for every definition of the query given
+    @return list of response dictionaries
     """
     import requests
     import json
@@ -10,12 +10,21 @@ def urbanDict(query):
     r = requests.get('http://api.urbandictionary.com/v0/define?term=%s' % (query))
     data = json.loads(r.text)
 
-    if data['list']:
-        response = {
-            'definition':data['list'][0]['definition'].encode('utf-8'),
-            'example':data['list'][0]['example'],
-            'permalink':data['list'][0]['permalink']
-        }
+    return [{
+        'definition':item['definition'].encode('utf-8'),
+        'example':item['example'].encode('utf-8'),
+        'permalink':item['permalink'].encode('utf-8')
+    } for item in data['list']]
+
+
+def urbanDict(query):
+    """
+    Searches urbandictionary.com for a definition to the query given
+    @return response dictionary 
+    """
+    definitions = urbanDefinitions(query)
+    if definitions:
+        response = definitions[0]
     else:
         response = None
 
@@ -1,21 +1,28 @@
-def currentWeather(city='Provo', state='UT', zip = None):
-    """
-    get the current weather for the given city, state
-    @param city: String, the city name
-    @param state: String, 2 letter state abbreviation (UT)
-    @return weather: Dict with status, temp rain (mm), and cloud %
-    """
-    import requests
-    import json
+import time
+import json
+import requests
+from collections import Counter
+from apis.locations import resolveLocation, normalizePlace
 
-    # send the request and get the data
-    if zip == None:
-        qstring = '%s,%s' % (city, state)
-    else:
-        qstring = '%s,USA' % (zip)
-    r = requests.get('http://api.openweathermap.org/data/2.5/weather?q=%s' % (qstring))
+BASE_URL = 'http://api.openweathermap.org/data/2.5/'
 
-    data = json.loads(r.text)
+# how long (seconds) a reading is good for before we ask upstream again
+CACHE_TTL = 15 * 60
+
+# openweathermap's group endpoint takes at most 20 city ids per call
+GROUP_SIZE = 20
+
+# seconds to wait on openweathermap, so a hung refresh can't stall its LoopingCall
+TIMEOUT = 10
+
+_cache = {}
+_request_counts = Counter()
+
+
+def _parseWeather(data):
+    """
+    Turn an openweathermap city record into our weather dict
+    """
     weather = {
         'status': '',
         'temp': '',
@@ -29,3 +36,80 @@ def currentWeather(city='Provo', state='UT', zip = None):
     weather['humidity'] = data['main']['humidity']
 
     return weather
+
+
+def currentWeather(city='Provo', state='UT', zip = None, count=True):
+    """
+    get the current weather for the given city, state
+    @param city: String, the city name
+    @param state: String, 2 letter state abbreviation (UT)
+    @param count: Bool, whether this counts as a user request for refreshWeather
+    @return weather: Dict with status, temp rain (mm), and cloud %
+    """
+    # places in the offline index share a cache entry no matter how they were typed
+    city_id = resolveLocation(city, state, zip)
+    if city_id is not None:
+        key = city_id
+        url = '%sweather?id=%s' % (BASE_URL, city_id)
+    elif zip == None:
+        key = normalizePlace(city, state)
+        url = '%sweather?q=%s,%s' % (BASE_URL, city, state)
+    else:
+        key = '%s,usa' % (zip)
+        url = '%sweather?q=%s,USA' % (BASE_URL, zip)
+
+    # only indexed places can be refreshed by id, so only they are counted
+    if count and city_id is not None:
+        _request_counts[city_id] += 1
+
+    cached = _cache.get(key)
+    if cached and time.time() - cached['fetched'] < CACHE_TTL:
+        return cached['weather']
+
+    # send the request and get the data
+    r = requests.get(url, timeout=TIMEOUT)
+    data = json.loads(r.text)
+    weather = _parseWeather(data)
+
+    _cache[key] = {'weather': weather, 'fetched': time.time()}
+    return weather
+
+
+def refreshWeather(limit=GROUP_SIZE):
+    """
+    Refresh the cache for the most requested indexed locations using the
+    multi-city group endpoint, so common requests are answered from memory
+    @param limit: Int, how many locations to refresh
+    @return count: Int, number of locations refreshed
+    """
+    # this runs in a worker thread while privmsg keeps using the cache and
+    # counts, so work from snapshots and don't assume a key is still there
+    now = time.time()
+    for key in [k for k, v in _cache.items() if now - v['fetched'] >= CACHE_TTL]:
+        _cache.pop(key, None)
+
+    counts = sorted(_request_counts.items(), key=lambda item: item[1], reverse=True)
+    city_ids = [key for key, _ in counts[:limit]]
+
+    count = 0
+    for i in range(0, len(city_ids), GROUP_SIZE):
+        ids = ','.join(city_ids[i:i + GROUP_SIZE])
+        r = requests.get('%sgroup?id=%s' % (BASE_URL, ids), timeout=TIMEOUT)
+        data = json.loads(r.text)
+
+        fetched = time.time()
+        for item in data.get('list', []):
+            _cache[str(item['id'])] = {'weather': _parseWeather(item), 'fetched': fetched}
+            count += 1
+
+    return count
+
+
+def warmWeather():
+    """
+    Refresh the most requested locations and make sure the default one is fresh
+    @return weather: Dict for the default location
+    """
+    refreshWeather()
+    # warming isn't a user asking, so keep it out of the popular set
+    return currentWeather(count=False)
@@ -2,6 +2,7 @@ import sys
 import urllib2
 import urllib
 import httplib
+from collections import OrderedDict
 from xml.etree import ElementTree as etree
  
 class wolfram(object):
@@ -20,7 +21,8 @@ class wolfram(object):
         return xml
  
     def _xmlparser(self, xml):
-        data_dics = {}
+        # keep the pods in the order wolfram ranked them
+        data_dics = OrderedDict()
         tree = etree.fromstring(xml)
         #retrieving every tag with label 'plaintext'
         for e in tree.findall('pod'):
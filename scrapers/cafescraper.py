@@ -1,7 +1,18 @@
+import time
+
+# the menu only changes once a day, so keep it around for a while
+CACHE_TTL = 60 * 60
+
+_cache = {}
+
 def scrapeCafe():
 	"""
 	Scrape the EastBay Cafe's site for the current lunch menu
 	"""
+	today = time.strftime('%Y-%m-%d')
+	if _cache.get('date') == today and time.time() - _cache['fetched'] < CACHE_TTL:
+		return _cache['menu']
+
 	from bs4 import BeautifulSoup
 	import requests
 
@@ -45,4 +56,7 @@ def scrapeCafe():
 	    	menu['stations'][k] = None
 	        pass
 
-	return menu
\ No newline at end of file
+	_cache['date'] = today
+	_cache['fetched'] = time.time()
+	_cache['menu'] = menu
+	return menu
@@ -0,0 +1,118 @@
+import os
+import re
+import json
+import time
+from collections import OrderedDict
+
+# pods whose answer changes from minute to minute, matched on the start of the title
+# since wolfram adds the place or unit, e.g. 'Latest recorded weather for Provo, Utah'
+VOLATILE_PODS = ['current', 'latest', 'result for current', 'local time', 'weather forecast']
+# questions about these get the short ttl whatever pods come back
+VOLATILE_WORDS = set([
+    'time', 'now', 'today', 'tonight', 'tomorrow', 'yesterday', 'current',
+    'currently', 'latest', 'weather', 'forecast', 'temperature', 'price', 'stock'
+])
+VOLATILE_TTL = 10 * 60
+STATIC_TTL = 30 * 24 * 60 * 60
+
+# only words that never change the meaning; verbs stay so tense is kept
+# and question words stay so 'who is x' and 'what is x' are different
+STOPWORDS = set(['a', 'an', 'the', 'please'])
+
+
+def normalizeQuestion(question):
+    """
+    Reduce a question to the key we store its answer under, so
+    'What is the speed of light?' and 'what is speed of light' match.
+    Digits and operators are kept so '2+2' and '2*2' stay apart.
+    @param question: String
+    @return key: unicode, empty if there is nothing to key on
+    """
+    if isinstance(question, str):
+        question = question.decode('utf-8', 'replace')
+    # double quotes anywhere, single quotes only around the whole question (f'(x) needs its prime)
+    question = re.sub(u'["\u201c\u201d`]', u'', question.lower(), flags=re.UNICODE)
+    question = question.strip().strip(u"'\u2018\u2019")
+    # a trailing '!' after a number or bracket is a factorial, not punctuation
+    question = re.sub(ur'(?:[?.]|(?<![\d)])!)+\s*$', u'', question, flags=re.UNICODE)
+    question = question.strip().strip(u"'\u2018\u2019")
+    words = question.split()
+    key = [w for w in words if w not in STOPWORDS]
+    # a question made only of stopwords still needs a key
+    return u' '.join(key or words)
+
+
+def answerTTL(result, question=u''):
+    """ How long (seconds) an answer to the question with these pods stays fresh """
+    for title in result:
+        if title.lower().startswith(tuple(VOLATILE_PODS)):
+            return VOLATILE_TTL
+    if VOLATILE_WORDS.intersection(re.findall(r'\w+', normalizeQuestion(question), re.UNICODE)):
+        return VOLATILE_TTL
+    return STATIC_TTL
+
+
+class AnswerStore(object):
+    """
+    Disk backed store of Wolfram answers keyed by normalized question,
+    evicting the least recently used answers once it is full
+    """
+    def __init__(self, filename, max_entries=500):
+        self.filename = filename
+        self.max_entries = max_entries
+        self.entries = self.load()
+
+    def load(self):
+        """ Read the persisted answers, starting empty if there aren't any """
+        try:
+            with open(self.filename, 'r') as f:
+                return json.loads(f.read())
+        except (IOError, ValueError):
+            return {}
+
+    def save(self):
+        """ Persist the answers, replacing the old file in one step """
+        tmp = self.filename + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(json.dumps(self.entries))
+        os.rename(tmp, self.filename)
+
+    def get(self, question):
+        """
+        Look up a fresh answer for the question
+        @return result: OrderedDict of pod title to text, or None
+        """
+        key = normalizeQuestion(question)
+        entry = self.entries.get(key) if key else None
+        if not entry:
+            return None
+        now = time.time()
+        if entry['expires'] < now:
+            del self.entries[key]
+            return None
+        entry['used'] = now
+        return OrderedDict(entry['pods'])
+
+    def put(self, question, result):
+        """ Remember the pods wolfram gave back for the question """
+        key = normalizeQuestion(question)
+        if not result or not key:
+            return
+        now = time.time()
+        self.entries[key] = {
+            'pods': list(result.items()),
+            'expires': now + answerTTL(result, question),
+            'used': now
+        }
+        self.evict()
+        self.save()
+
+    def evict(self):
+        """ Drop expired answers, then the least recently used ones over the limit """
+        now = time.time()
+        for key in [k for k, v in self.entries.items() if v['expires'] < now]:
+            del self.entries[key]
+        overflow = len(self.entries) - self.max_entries
+        if overflow > 0:
+            for key in sorted(self.entries, key=lambda k: self.entries[k]['used'])[:overflow]:
+                del self.entries[key]
@@ -0,0 +1,58 @@
+import time
+
+
+class ResultCursors(object):
+    """
+    Holds the rest of a multi-item answer per (channel, user) so 'more'
+    can page through it without asking upstream again
+    """
+    def __init__(self, ttl=600, max_cursors=200):
+        self.ttl = ttl
+        self.max_cursors = max_cursors
+        self.cursors = {}
+
+    def start(self, key, items):
+        """
+        Remember items for key, replacing whatever was there
+        @param key: tuple of (channel, user)
+        @param items: list of answers still to be shown
+        """
+        self.expire()
+        if not items:
+            self.cursors.pop(key, None)
+            return
+        if key not in self.cursors and len(self.cursors) >= self.max_cursors:
+            # make room by dropping the cursor that is closest to expiring
+            oldest = min(self.cursors, key=lambda k: self.cursors[k]['expires'])
+            del self.cursors[oldest]
+        self.cursors[key] = {
+            'items': list(items),
+            'expires': time.time() + self.ttl
+        }
+
+    def more(self, key):
+        """
+        Get the next item for key
+        @return item, or None if there is nothing left
+        """
+        self.expire()
+        cursor = self.cursors.get(key)
+        if not cursor:
+            return None
+        item = cursor['items'].pop(0)
+        if cursor['items']:
+            cursor['expires'] = time.time() + self.ttl
+        else:
+            del self.cursors[key]
+        return item
+
+    def remaining(self, key):
+        """ How many items are left for key """
+        cursor = self.cursors.get(key)
+        return len(cursor['items']) if cursor else 0
+
+    def expire(self):
+        """ Drop cursors that have outlived the ttl """
+        now = time.time()
+        for key in [k for k, v in self.cursors.items() if v['expires'] < now]:
+            del self.cursors[key]
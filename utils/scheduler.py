@@ -0,0 +1,163 @@
+import json
+import time
+import heapq
+from datetime import datetime, timedelta
+from twisted.internet import defer
+from twisted.python import log
+
+# if the bot was down when a job was due, still run it if we're back this soon
+MISSED_GRACE = 60 * 60
+
+
+def _parseField(field, low, high):
+    """
+    Expand one cron field ('*', '5', '1-5', '*/15', '5/15', '0,30') into the set of values it allows
+    """
+    values = set()
+    for part in field.split(','):
+        if '/' in part:
+            part, step = part.split('/')
+            step = int(step)
+            if step < 1:
+                raise ValueError('cron step must be at least 1: %s' % field)
+        else:
+            step = None
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = [int(p) for p in part.split('-')]
+        else:
+            start = end = int(part)
+            # like cron, 'N/step' runs from N to the top of the field
+            if step is not None:
+                end = high
+        if start < low or end > high or start > end:
+            raise ValueError('cron field %s is out of range' % field)
+        values.update(range(start, end + 1, step or 1))
+    return values
+
+
+class CronSpec(object):
+    """
+    A cron style schedule: 'minute hour day-of-month month day-of-week',
+    e.g. '25 11 * * 1-5' for 11:25 on weekdays (0 and 7 are Sunday)
+    """
+    def __init__(self, when):
+        fields = when.split()
+        if len(fields) != 5:
+            raise ValueError('cron schedule needs 5 fields: %s' % when)
+        self.when = when
+        self.minutes = sorted(_parseField(fields[0], 0, 59))
+        self.hours = sorted(_parseField(fields[1], 0, 23))
+        self.days = _parseField(fields[2], 1, 31)
+        self.months = _parseField(fields[3], 1, 12)
+        self.weekdays = set(d % 7 for d in _parseField(fields[4], 0, 7))
+        # like cron, a restricted day of month OR day of week is enough
+        self.any_day = fields[2].startswith('*')
+        self.any_weekday = fields[4].startswith('*')
+
+    def matchesDay(self, day):
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        in_weekdays = (day.isoweekday() % 7) in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def nextRun(self, after):
+        """
+        Get the first time this schedule fires after a timestamp
+        @param after: Float, unix timestamp
+        @return next_run: Float, unix timestamp in local time
+        """
+        start = datetime.fromtimestamp(after).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        for _ in range(366 * 5):
+            if self.matchesDay(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return time.mktime(candidate.timetuple())
+            day += timedelta(days=1)
+        raise ValueError('cron schedule never fires: %s' % self.when)
+
+
+class Scheduler(object):
+    """
+    Runs named jobs on cron style schedules using a heap of next run
+    times and a single reactor timer. Next run times are saved to disk
+    so a restart doesn't lose track of a job that was about to run.
+    """
+    def __init__(self, filename, clock=None):
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self.filename = filename
+        self.clock = clock
+        self.jobs = {}
+        self.heap = []
+        self.call = None
+        self.saved = self.load()
+
+    def load(self):
+        """ Read the persisted next run times """
+        try:
+            with open(self.filename, 'r') as f:
+                return json.loads(f.read())
+        except (IOError, ValueError):
+            return {}
+
+    def save(self):
+        """ Persist the next run time of every job """
+        runs = {}
+        for next_run, name in self.heap:
+            runs[name] = {'when': self.jobs[name][0].when, 'next_run': next_run}
+        with open(self.filename, 'w') as f:
+            f.write(json.dumps(runs))
+
+    def add(self, name, when, func, *args):
+        """
+        Schedule func(*args) to run whenever the cron expression fires
+        @param name: String, unique job name
+        @param when: String, cron expression
+        """
+        spec = CronSpec(when)
+        self.jobs[name] = (spec, func, args)
+
+        now = self.clock.seconds()
+        saved = self.saved.get(name)
+        if saved and saved['when'] == when and saved['next_run'] > now - MISSED_GRACE:
+            next_run = saved['next_run']
+        else:
+            next_run = spec.nextRun(now)
+        heapq.heappush(self.heap, (next_run, name))
+
+    def start(self):
+        self.save()
+        self._schedule()
+
+    def stop(self):
+        if self.call is not None and self.call.active():
+            self.call.cancel()
+        self.call = None
+
+    def _schedule(self):
+        """ Set the reactor timer for whichever job is due first """
+        self.stop()
+        if self.heap:
+            delay = max(0, self.heap[0][0] - self.clock.seconds())
+            self.call = self.clock.callLater(delay, self._runDue)
+
+    def _runDue(self):
+        """ Run every job that is due, then queue up their next runs """
+        self.call = None
+        now = self.clock.seconds()
+        while self.heap and self.heap[0][0] <= now:
+            _, name = heapq.heappop(self.heap)
+            spec, func, args = self.jobs[name]
+            d = defer.maybeDeferred(func, *args)
+            d.addErrback(log.err, 'scheduled job %s failed' % name)
+            heapq.heappush(self.heap, (spec.nextRun(now), name))
+        self.save()
+        self._schedule()